@@ -121,7 +121,39 @@ def connect_to_database():
 # STEP 3: RUN SQL QUERIES FOR SALES ANALYSIS
 # =============================================================================
 
-def run_sales_queries(conn):
+def optimize_dataframe_dtypes(df):
+    """Downcast DataFrame columns to memory-efficient dtypes"""
+    optimized = df.copy()
+    
+    for column in optimized.columns:
+        series = optimized[column]
+        
+        if column.endswith('_date'):
+            # SQLite stores dates as TEXT - parse them into datetime64
+            optimized[column] = pd.to_datetime(series)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            # Categorical only pays off when labels repeat
+            if series.nunique() < len(series) / 2:
+                optimized[column] = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series):
+            # Floor at int32 so SUM/COUNT columns don't wrap on later arithmetic
+            downcast = pd.to_numeric(series, downcast='integer')
+            if downcast.dtype.itemsize < 4:
+                downcast = downcast.astype('int32')
+            optimized[column] = downcast
+        elif pd.api.types.is_float_dtype(series):
+            # Money columns stay float64 so they print and add up to the cent
+            if column == 'revenue' or column.endswith('_revenue') or column.startswith('avg_'):
+                continue
+            
+            # Other floats: only downcast when every stored value survives to the cent
+            downcast = pd.to_numeric(series, downcast='float')
+            if np.allclose(downcast.astype('float64'), series, rtol=0, atol=0.005, equal_nan=True):
+                optimized[column] = downcast
+    
+    return optimized
+
+def run_sales_queries(conn, optimize=False):
     """Run various SQL queries to analyze sales data"""
     print("\n📊 STEP 3: Running SQL Queries for Sales Analysis")
     print("-" * 50)
@@ -227,7 +259,180 @@ def run_sales_queries(conn):
     for column in df_summary.columns:
         print(f"   {column}: {df_summary[column].iloc[0]}")
     
-    return df_products, df_categories, df_reps, df_daily, df_summary
+    results = [df_products, df_categories, df_reps, df_daily, df_summary]
+    
+    # Optional: downcast results to memory-efficient dtypes
+    if optimize:
+        print("\n\n💾 Optimizing DataFrame Memory Usage")
+        names = ['products', 'categories', 'reps', 'daily', 'summary']
+        total_before = total_after = 0
+        
+        for i, name in enumerate(names):
+            before = results[i].memory_usage(deep=True).sum()
+            results[i] = optimize_dataframe_dtypes(results[i])
+            after = results[i].memory_usage(deep=True).sum()
+            total_before += before
+            total_after += after
+            print(f"   {name}: {before:,} bytes → {after:,} bytes")
+            print(f"      dtypes: {', '.join(f'{c}={t}' for c, t in results[i].dtypes.items())}")
+        
+        print(f"   TOTAL: {total_before:,} bytes → {total_after:,} bytes "
+              f"({(1 - total_after / total_before) * 100:.1f}% saved)")
+    
+    return tuple(results)
+
+# =============================================================================
+# STEP 3B: CUSTOMER RFM ANALYTICS
+# =============================================================================
+
+def run_customer_analytics(conn, chunk_size=50000):
+    """Refresh customer-level RFM metrics and build a cohort retention matrix"""
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be a positive integer, got {chunk_size}")
+    
+    print("\n👥 STEP 3B: Customer RFM Analytics")
+    print("-" * 50)
+    
+    cursor = conn.cursor()
+    
+    # Index for per-customer scans by date
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sales_customer_date
+        ON sales (customer_id, sale_date)
+    ''')
+    
+    # Aggregates are additive, so new sales can be merged into existing rows
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customer_rfm (
+            customer_id INTEGER PRIMARY KEY,
+            first_purchase_date DATE NOT NULL,
+            last_purchase_date DATE NOT NULL,
+            frequency INTEGER NOT NULL,
+            monetary DECIMAL(12,2) NOT NULL
+        )
+    ''')
+    
+    # Watermark: highest sales.id already merged into customer_rfm
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customer_rfm_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_sale_id INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO customer_rfm_state (id, last_sale_id) VALUES (1, 0)")
+    
+    # Distinct active months per customer, kept in step with customer_rfm for cohorts
+    has_activity_table = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customer_activity_month'"
+    ).fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customer_activity_month (
+            customer_id INTEGER NOT NULL,
+            activity_month TEXT NOT NULL,
+            PRIMARY KEY (customer_id, activity_month)
+        ) WITHOUT ROWID
+    ''')
+    conn.commit()
+    
+    insert_activity = '''
+        INSERT OR IGNORE INTO customer_activity_month (customer_id, activity_month)
+        SELECT DISTINCT customer_id, strftime('%Y-%m', sale_date)
+        FROM sales 
+        WHERE id > ? AND id <= ? AND customer_id IS NOT NULL
+    '''
+    
+    last_sale_id = cursor.execute("SELECT last_sale_id FROM customer_rfm_state WHERE id = 1").fetchone()[0]
+    max_sale_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sales").fetchone()[0]
+    
+    # Backfill activity for sales merged before the activity table existed
+    if not has_activity_table:
+        for lower_id in range(0, last_sale_id, chunk_size):
+            cursor.execute(insert_activity, (lower_id, min(lower_id + chunk_size, last_sale_id)))
+            conn.commit()
+    
+    # Merge new sales in id-range chunks; each chunk commits with its watermark
+    chunks = 0
+    new_sales = max_sale_id - last_sale_id
+    while last_sale_id < max_sale_id:
+        upper_id = min(last_sale_id + chunk_size, max_sale_id)
+        cursor.execute('''
+            INSERT INTO customer_rfm (customer_id, first_purchase_date, last_purchase_date, frequency, monetary)
+            SELECT 
+                customer_id,
+                MIN(sale_date),
+                MAX(sale_date),
+                COUNT(*),
+                SUM(quantity * price)
+            FROM sales 
+            WHERE id > ? AND id <= ? AND customer_id IS NOT NULL
+            GROUP BY customer_id
+            ON CONFLICT (customer_id) DO UPDATE SET
+                first_purchase_date = MIN(first_purchase_date, excluded.first_purchase_date),
+                last_purchase_date = MAX(last_purchase_date, excluded.last_purchase_date),
+                frequency = frequency + excluded.frequency,
+                monetary = monetary + excluded.monetary
+        ''', (last_sale_id, upper_id))
+        cursor.execute(insert_activity, (last_sale_id, upper_id))
+        cursor.execute("UPDATE customer_rfm_state SET last_sale_id = ? WHERE id = 1", (upper_id,))
+        conn.commit()
+        last_sale_id = upper_id
+        chunks += 1
+    
+    print(f"✅ Merged {new_sales:,} new sales into 'customer_rfm' in {chunks} chunk(s)")
+    
+    # Recency and the retention cutoff share one anchor: the latest customer sale
+    latest_sale_date = cursor.execute("SELECT MAX(sale_date) FROM sales WHERE customer_id IS NOT NULL").fetchone()[0]
+    
+    # Recency is relative to the latest sale, so it is computed at read time
+    query_rfm = """
+        SELECT 
+            customer_id,
+            CAST(julianday(?) - julianday(last_purchase_date) AS INTEGER) AS recency_days,
+            frequency,
+            ROUND(monetary, 2) AS monetary,
+            first_purchase_date
+        FROM customer_rfm 
+        ORDER BY monetary DESC
+        LIMIT 10
+    """
+    
+    df_rfm = pd.read_sql_query(query_rfm, conn, params=(latest_sale_date,))
+    print("\n📋 Top 10 Customers by Monetary Value:")
+    print(df_rfm.to_string(index=False))
+    
+    # Cohort retention: active customers per month since first purchase
+    query_cohorts = """
+        SELECT 
+            strftime('%Y-%m', r.first_purchase_date) AS cohort_month,
+            (CAST(substr(a.activity_month, 1, 4) AS INTEGER) * 12 + CAST(substr(a.activity_month, 6, 2) AS INTEGER))
+              - (CAST(strftime('%Y', r.first_purchase_date) AS INTEGER) * 12 + CAST(strftime('%m', r.first_purchase_date) AS INTEGER)) AS month_offset,
+            COUNT(*) AS active_customers
+        FROM customer_activity_month a
+        JOIN customer_rfm r ON r.customer_id = a.customer_id
+        GROUP BY cohort_month, month_offset
+        ORDER BY cohort_month, month_offset
+    """
+    
+    df_cohorts = pd.read_sql_query(query_cohorts, conn)
+    
+    if df_cohorts.empty:
+        df_retention = pd.DataFrame()
+    else:
+        cohort_counts = df_cohorts.pivot(index='cohort_month', columns='month_offset', values='active_customers')
+        
+        # Months up to the latest sale with no activity are 0%, later months stay NaN
+        latest_month = pd.Period(latest_sale_date, freq='M')
+        months_elapsed = np.array([(latest_month - pd.Period(month, freq='M')).n for month in cohort_counts.index])
+        cohort_counts = cohort_counts.reindex(columns=range(months_elapsed.max() + 1))
+        observed = months_elapsed[:, None] >= cohort_counts.columns.values[None, :]
+        cohort_counts = cohort_counts.fillna(0).where(observed)
+        
+        df_retention = cohort_counts.div(cohort_counts[0], axis=0).round(3)
+    
+    print("\n📋 Cohort Retention Matrix (share of cohort active, by months since first purchase):")
+    print(df_retention.to_string())
+    
+    return df_rfm, df_retention
 
 # =============================================================================
 # STEP 4: CREATE VISUALIZATIONS
@@ -634,7 +839,10 @@ def main():
             return
         
         # Step 3: Run SQL queries
-        df_products, df_categories, df_reps, df_daily, df_summary = run_sales_queries(conn)
+        df_products, df_categories, df_reps, df_daily, df_summary = run_sales_queries(conn, optimize=True)
+        
+        # Step 3B: Customer RFM analytics
+        df_rfm, df_retention = run_customer_analytics(conn)
         
         # Step 4: Create visualizations
         create_visualizations(df_products, df_categories, df_reps, df_daily)
@@ -655,13 +863,14 @@ def main():
         print("📊 Analysis Summary:")
         print("   • SQLite database created with 20 sales records")
         print("   • 5 comprehensive SQL queries executed")
+        print("   • Customer RFM metrics and cohort retention computed")
         print("   • Multiple visualizations generated")
         print("   • All interview questions answered")
         print("   • Professional documentation created")
         
         print(f"\n📁 Generated Files:")
         files = [
-            "sales_data.db - SQLite database",
+            "sales_data.db - SQLite database (incl. customer_rfm, customer_rfm_state, customer_activity_month, idx_sales_customer_date)",
             "sales_analysis_charts.png - Comprehensive dashboard",
             "simple_sales_chart.png - Basic bar chart (as requested)",
             "project_summary.txt - Complete project documentation",
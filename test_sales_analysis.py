@@ -0,0 +1,158 @@
+import sqlite3
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pandas as pd
+import pytest
+
+from sales_analysis import (
+    create_sales_database,
+    create_visualizations,
+    optimize_dataframe_dtypes,
+    run_customer_analytics,
+    run_sales_queries,
+)
+
+
+def test_repeating_text_column_becomes_category():
+    df = pd.DataFrame({'category': ['a', 'a', 'b', 'a', 'b', 'b']})
+    optimized = optimize_dataframe_dtypes(df)
+    assert isinstance(optimized['category'].dtype, pd.CategoricalDtype)
+    assert optimized['category'].tolist() == df['category'].tolist()
+
+
+def test_unique_text_column_stays_string():
+    df = pd.DataFrame({'product': ['Laptop', 'Mouse', 'Monitor']})
+    optimized = optimize_dataframe_dtypes(df)
+    assert not isinstance(optimized['product'].dtype, pd.CategoricalDtype)
+
+
+def test_date_column_becomes_datetime():
+    df = pd.DataFrame({'sale_date': ['2024-01-15', '2024-01-16']})
+    optimized = optimize_dataframe_dtypes(df)
+    assert pd.api.types.is_datetime64_any_dtype(optimized['sale_date'])
+
+
+def test_integer_columns_are_floored_at_int32():
+    df = pd.DataFrame({'total_qty': [100, 27]})
+    optimized = optimize_dataframe_dtypes(df)
+    assert optimized['total_qty'].dtype == 'int32'
+    assert (optimized['total_qty'] * 2).tolist() == [200, 54]
+    assert (optimized['total_qty'] + 100).tolist() == [200, 127]
+
+
+def test_money_columns_stay_float64():
+    df = pd.DataFrame({'revenue': [4999.95, 1299.9], 'avg_price': [999.99, 29.99]})
+    optimized = optimize_dataframe_dtypes(df)
+    assert optimized['revenue'].dtype == 'float64'
+    assert optimized['avg_price'].dtype == 'float64'
+
+
+def test_float_downcast_only_when_values_survive_to_the_cent():
+    df = pd.DataFrame({'small': [0.25, 1.5], 'large': [123456789.01, 1.0]})
+    optimized = optimize_dataframe_dtypes(df)
+    assert optimized['small'].dtype == 'float32'
+    assert optimized['large'].dtype == 'float64'
+
+
+def test_optimized_results_use_less_memory_and_still_plot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_sales_database()
+    conn = sqlite3.connect('sales_data.db')
+    
+    plain = run_sales_queries(conn)
+    optimized = run_sales_queries(conn, optimize=True)
+    
+    before = sum(df.memory_usage(deep=True).sum() for df in plain)
+    after = sum(df.memory_usage(deep=True).sum() for df in optimized)
+    assert after < before
+    
+    df_products, df_categories, df_reps, df_daily, _ = optimized
+    create_visualizations(df_products, df_categories, df_reps, df_daily)
+    assert (tmp_path / 'sales_analysis_charts.png').exists()
+    assert (tmp_path / 'simple_sales_chart.png').exists()
+    conn.close()
+
+
+def _sales_connection(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product TEXT NOT NULL,
+            category TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            sale_date DATE NOT NULL,
+            customer_id INTEGER,
+            sales_rep TEXT
+        )
+    ''')
+    conn.executemany('''
+        INSERT INTO sales (product, category, quantity, price, sale_date, customer_id, sales_rep)
+        VALUES ('Pens', 'Office Supplies', 1, 10.0, ?, ?, 'John Smith')
+    ''', rows)
+    return conn
+
+
+def test_customer_analytics_rejects_non_positive_chunk_size():
+    conn = _sales_connection([])
+    with pytest.raises(ValueError):
+        run_customer_analytics(conn, chunk_size=0)
+
+
+def test_customer_analytics_handles_empty_sales():
+    conn = _sales_connection([])
+    df_rfm, df_retention = run_customer_analytics(conn)
+    assert df_rfm.empty
+    assert df_retention.empty
+
+
+def test_retention_fills_elapsed_months_with_zero():
+    conn = _sales_connection([
+        ('2024-01-05', 1), ('2024-03-15', 1), ('2024-01-09', 2),
+        ('2024-02-10', 3), ('2024-02-20', 3),
+    ])
+    df_rfm, df_retention = run_customer_analytics(conn, chunk_size=2)
+    assert df_rfm.set_index('customer_id')['frequency'].to_dict() == {1: 2, 2: 1, 3: 2}
+    assert list(df_retention.columns) == [0, 1, 2]
+    assert df_retention.loc['2024-01'].tolist() == [1.0, 0.0, 0.5]
+    assert df_retention.loc['2024-02', 1] == 0.0
+    assert pd.isna(df_retention.loc['2024-02', 2])
+
+
+def _rfm_rows(conn):
+    rows = conn.execute('''
+        SELECT customer_id, first_purchase_date, last_purchase_date, frequency, monetary
+        FROM customer_rfm ORDER BY customer_id
+    ''').fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+def test_customer_rfm_refreshes_incrementally():
+    conn = _sales_connection([('2024-01-05', 1), ('2024-01-09', 2)])
+    run_customer_analytics(conn)
+    assert conn.execute("SELECT last_sale_id FROM customer_rfm_state").fetchone()[0] == 2
+    
+    conn.executemany('''
+        INSERT INTO sales (product, category, quantity, price, sale_date, customer_id, sales_rep)
+        VALUES ('Pens', 'Office Supplies', 1, ?, ?, ?, 'John Smith')
+    ''', [(11.0, '2023-12-01', 1), (5.0, '2024-02-01', 2), (7.0, '2024-02-03', 3)])
+    run_customer_analytics(conn, chunk_size=2)
+    
+    assert _rfm_rows(conn) == {
+        1: ('2023-12-01', '2024-01-05', 2, 21.0),
+        2: ('2024-01-09', '2024-02-01', 2, 15.0),
+        3: ('2024-02-03', '2024-02-03', 1, 7.0),
+    }
+    assert conn.execute("SELECT last_sale_id FROM customer_rfm_state").fetchone()[0] == 5
+
+
+def test_cohort_activity_is_backfilled_for_existing_watermark():
+    conn = _sales_connection([('2024-01-05', 1), ('2024-02-05', 1), ('2024-01-09', 2)])
+    run_customer_analytics(conn)
+    conn.execute("DROP TABLE customer_activity_month")
+    
+    _, df_retention = run_customer_analytics(conn, chunk_size=2)
+    assert df_retention.loc['2024-01'].tolist() == [1.0, 0.5]